@@ -0,0 +1,112 @@
+"""
+Benchmark de inicialização: tempo do lançamento até a primeira rota pontuada.
+
+Executa o caminho de inicialização do bot (bot.inicializar) com um snapshot de mercados
+fixo (gerado com semente fixa) e livros de ofertas falsos, sem credenciais da OKX ou do
+Telegram. Requer apenas as dependências do requirements.txt instaladas.
+
+Uso:
+    python benchmark_startup.py              # inicialização a partir do cache de mercados
+    python benchmark_startup.py --sem-cache  # carregamento completo dos mercados (cold start)
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+
+import bot
+
+SEMENTE = 42
+QUANTIDADE_MOEDAS = 80
+QUOTES_SECUNDARIAS = ['BTC', 'ETH', 'USDC']
+LATENCIA_REST_SEGUNDOS = 0.5  # load_markets() simulado
+LATENCIA_WS_SEGUNDOS = 0.05   # primeira mensagem de cada livro de ofertas
+TIMEOUT_SEGUNDOS = 120
+
+def gerar_snapshot_mercados():
+    """Mercados spot sintéticos e determinísticos no formato do ccxt."""
+    aleatorio = random.Random(SEMENTE)
+    moedas = [f"C{i:03d}" for i in range(QUANTIDADE_MOEDAS)]
+    pares = [('BTC', 'USDT'), ('ETH', 'USDT'), ('USDC', 'USDT'), ('ETH', 'BTC')]
+    for moeda in moedas:
+        pares.append((moeda, 'USDT'))
+        pares.extend((moeda, quote) for quote in QUOTES_SECUNDARIAS if aleatorio.random() < 0.4)
+
+    markets = {}
+    for base, quote in pares:
+        symbol = f"{base}/{quote}"
+        markets[symbol] = {
+            'id': f"{base}-{quote}", 'symbol': symbol, 'base': base, 'quote': quote,
+            'type': 'spot', 'spot': True, 'active': True,
+            'precision': {'amount': 1e-08, 'price': 1e-08},
+            'limits': {'amount': {'min': 1e-08}, 'cost': {'min': 1}},
+        }
+    return markets
+
+def livro_falso(symbol):
+    return {
+        'symbol': symbol,
+        'bids': [['0.999', '1000000']],
+        'asks': [['1.001', '1000000']],
+        'timestamp': None,
+    }
+
+class BotFalso:
+    async def send_message(self, *args, **kwargs):
+        pass
+
+class ExchangeFalsa:
+    id = 'okx'
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+        self.markets = {}
+        self.subscriptions = {}
+
+    def set_markets(self, markets):
+        self.markets = markets
+
+    async def load_markets(self, reload=False):
+        await asyncio.sleep(LATENCIA_REST_SEGUNDOS)
+        self.markets = dict(self._snapshot)
+        return self.markets
+
+    async def fetch_balance(self):
+        return {moeda: {'free': 1000, 'total': 1000} for moeda in bot.MOEDAS_BASE_OPERACIONAIS}
+
+    async def watch_order_book(self, symbol, limit=None):
+        await asyncio.sleep(LATENCIA_WS_SEGUNDOS)
+        return livro_falso(symbol)
+
+    async def close(self):
+        pass
+
+async def executar(sem_cache):
+    snapshot = gerar_snapshot_mercados()
+    with tempfile.TemporaryDirectory() as diretorio:
+        bot.MARKETS_CACHE_PATH = os.path.join(diretorio, 'markets_cache.json')
+        if not sem_cache:
+            bot.salvar_cache_mercados('okx', snapshot)
+
+        await bot.inicializar(criar_bot=BotFalso, criar_exchange=lambda: ExchangeFalsa(snapshot))
+        loop_task = asyncio.create_task(bot.engine.run_arbitrage_loop_outer())
+        try:
+            await asyncio.wait_for(bot.engine.primeira_rota_pontuada.wait(), timeout=TIMEOUT_SEGUNDOS)
+        except asyncio.TimeoutError:
+            print(f"Nenhuma rota pontuada em {TIMEOUT_SEGUNDOS}s.\n{bot.relatorio_inicializacao()}")
+            return 1
+        finally:
+            loop_task.cancel()
+
+    cenario = 'sem cache' if sem_cache else 'com cache'
+    print(f"Benchmark de inicialização ({cenario}, {len(snapshot)} mercados, "
+          f"{len(bot.engine.rotas_viaveis)} rotas):\n{bot.relatorio_inicializacao()}")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sem-cache', action='store_true', help="ignora o cache e carrega os mercados da exchange")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(executar(args.sem_cache)))
@@ -1,15 +1,27 @@
+import time
+_STARTUP_T0 = time.perf_counter()
+
 import os
+import json
+import heapq
+import queue
+import atexit
 import logging
-import telebot.asyncio_helper as asyncio_helper
-from telebot.async_telebot import AsyncTeleBot
-import ccxt.pro as ccxt
+import logging.handlers
+import threading
+from collections import OrderedDict
 from decimal import Decimal, getcontext, InvalidOperation
 import traceback
 import asyncio
 from datetime import datetime, timedelta
 
+# ccxt.pro e o cliente do Telegram são importados sob demanda em _importar_dependencias(),
+# em paralelo com a leitura do cache de mercados, para acelerar a inicialização.
+ccxt = None
+AsyncTeleBot = None
+
 # --- Global Configuration ---
-logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
+# O logging é configurado em configurar_logging() (fila + QueueListener), logo após os handlers.
 getcontext().prec = 30
 
 # --- Environment Variables ---
@@ -33,6 +45,20 @@ VERBOSE_ERROR_LOGGING = True
 MAX_RECONNECT_ATTEMPTS = 5
 PROBLEM_PAIRS_COOLDOWN_MINUTES = 15
 
+# --- Cache de Mercados (inicialização rápida) ---
+MARKETS_CACHE_PATH = os.getenv("MARKETS_CACHE_PATH", "markets_cache.json")
+MARKETS_CACHE_VERSION = 1
+MARKETS_CACHE_MAX_AGE_HOURS = 72
+
+# --- Logging ---
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_JSONL_PATH = os.getenv("LOG_JSONL_PATH")  # Opcional: oportunidades e execuções em JSON lines
+LOG_SAMPLE_BURST = 5
+LOG_SAMPLE_WINDOW_SECONDS = 60
+TELEGRAM_LOG_MIN_INTERVAL_SECONDS = 30
+TELEGRAM_MAX_MESSAGE_CHARS = 3500  # abaixo do limite de 4096 caracteres do Telegram
+AMOSTRAR = {'amostrar': True}  # extra= para mensagens de alta frequência sujeitas a amostragem
+
 # --- ALTERAÇÃO SOLICITADA: NÍVEIS DE STOP-LOSS REDUZIDOS PELA METADE ---
 STOP_LOSS_LEVEL_1_PERCENT = Decimal("-0.25") # Antes era -0.5
 STOP_LOSS_LEVEL_2_PERCENT = Decimal("-0.5")  # Antes era -1.0
@@ -42,26 +68,217 @@ class TelegramHandler(logging.Handler):
     """
     Handler de log para enviar mensagens de CRITICAL para o Telegram.
     A mensagem de CRITICAL agora é usada apenas para erros inesperados.
+    Roda na thread do QueueListener e envia no máximo uma mensagem a cada
+    TELEGRAM_LOG_MIN_INTERVAL_SECONDS. Registros que chegam dentro da janela são
+    acumulados e enviados juntos, por um timer do event loop, quando a janela fecha.
     """
     def __init__(self, bot_instance, chat_id, loop, level=logging.CRITICAL):
         super().__init__(level)
         self.bot = bot_instance
         self.chat_id = chat_id
         self.loop = loop
-        self.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        self.setFormatter(logging.Formatter(LOG_FORMAT))
+        self._ultimo_envio = float('-inf')
+        self._pendentes = []
+        self._envio_agendado = False
 
     def emit(self, record):
         log_entry = self.format(record)
+        with self.lock:
+            espera = self._ultimo_envio + TELEGRAM_LOG_MIN_INTERVAL_SECONDS - time.monotonic()
+            if espera > 0 or self._envio_agendado:
+                self._pendentes.append(log_entry)
+                if not self._envio_agendado:
+                    self._envio_agendado = True
+                    try:
+                        self.loop.call_soon_threadsafe(self.loop.call_later, espera, self._enviar_pendentes)
+                    except RuntimeError as e:
+                        self._envio_agendado = False
+                        print(f"Falha ao agendar envio de log para o Telegram: {e}")
+                return
+            self._ultimo_envio = time.monotonic()
+        self._enviar([log_entry])
+
+    def _enviar_pendentes(self):
+        """Executado no event loop quando a janela fecha: envia os registros acumulados."""
+        with self.lock:
+            pendentes, self._pendentes = self._pendentes, []
+            self._envio_agendado = False
+            self._ultimo_envio = time.monotonic()
+        if pendentes:
+            self._enviar(pendentes)
+
+    def _enviar(self, entradas):
+        texto = "\n\n".join(entradas)
+        if len(entradas) > 1:
+            texto = f"({len(entradas)} mensagens agrupadas)\n\n{texto}"
+        if len(texto) > TELEGRAM_MAX_MESSAGE_CHARS:
+            texto = texto[:TELEGRAM_MAX_MESSAGE_CHARS] + "\n(...)"
         try:
             asyncio.run_coroutine_threadsafe(
                 # A mensagem de "ERRO CRÍTICO" agora é reservada para falhas graves,
                 # e o stop-loss tem sua própria mensagem dedicada.
-                self.bot.send_message(self.chat_id, f"🔴 **ERRO CRÍTICO NO BOT!**\n\n`{log_entry}`", parse_mode="Markdown"),
+                self.bot.send_message(self.chat_id, f"🔴 **ERRO CRÍTICO NO BOT!**\n\n`{texto}`", parse_mode="Markdown"),
                 self.loop
             )
         except Exception as e:
             print(f"Falha ao enviar log para o Telegram: {e}")
 
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que enfileira o registro sem formatá-lo.
+    msg/args seguem intactos e a formatação acontece na thread do QueueListener,
+    fora do event loop. Os args devem ser valores imutáveis (str, Decimal, tuplas).
+    """
+    def prepare(self, record):
+        return record
+
+class SamplingFilter(logging.Filter):
+    """
+    Amostragem de mensagens de alta frequência (marcadas com extra=AMOSTRAR):
+    no máximo `burst` registros por modelo de mensagem a cada `window_seconds`.
+    Quando uma janela com registros suprimidos fecha (por timer ou descarte), um resumo
+    informa quantos foram suprimidos e quais valores (args) eles traziam, para que a
+    amostragem nunca esconda quais pares ou símbolos geraram as mensagens.
+    O mapa de janelas é limitado a MAX_CHAVES (a janela mais antiga é descartada).
+    """
+    MAX_CHAVES = 1000
+    MAX_VALORES_RESUMO = 20
+
+    def __init__(self, burst, window_seconds):
+        super().__init__()
+        self.burst = burst
+        self.window_seconds = window_seconds
+        self._janelas = OrderedDict()  # modelo -> _JanelaDeAmostragem
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if not getattr(record, 'amostrar', False):
+            return True
+        agora = time.monotonic()
+        resumos = []
+        with self._lock:
+            janela = self._janelas.get(record.msg)
+            if janela is not None and agora - janela.inicio >= self.window_seconds:
+                del self._janelas[record.msg]
+                resumos.append(janela)
+                janela = None
+            if janela is None:
+                if len(self._janelas) >= self.MAX_CHAVES:
+                    resumos.append(self._janelas.popitem(last=False)[1])
+                self._janelas[record.msg] = _JanelaDeAmostragem(agora)
+                permitido = True
+            elif janela.emitidas < self.burst:
+                janela.emitidas += 1
+                permitido = True
+            else:
+                janela.suprimir(record, self.MAX_VALORES_RESUMO)
+                if janela.suprimidas == 1:
+                    self._agendar_fechamento(record.msg, janela)
+                permitido = False
+        for janela in resumos:
+            self._registrar_resumo(janela)
+        return permitido
+
+    def _agendar_fechamento(self, modelo, janela):
+        atraso = max(0.0, janela.inicio + self.window_seconds - time.monotonic())
+        try:
+            asyncio.get_running_loop().call_later(atraso, self._fechar, modelo, janela)
+        except RuntimeError:
+            # Registro feito fora do event loop (ex.: asyncio.to_thread).
+            timer = threading.Timer(atraso, self._fechar, (modelo, janela))
+            timer.daemon = True
+            timer.start()
+
+    def _fechar(self, modelo, janela):
+        with self._lock:
+            if self._janelas.get(modelo) is not janela:
+                return  # Já resumida ao abrir a janela seguinte ou ao ser descartada.
+            del self._janelas[modelo]
+        self._registrar_resumo(janela)
+
+    def _registrar_resumo(self, janela):
+        if not janela.suprimidas:
+            return
+        valores = ", ".join(janela.valores)
+        if janela.valores_extras:
+            valores += f" e outras {janela.valores_extras} ocorrências"
+        logging.log(janela.nivel, "%s (+%d mensagens semelhantes suprimidas em %ds; valores: %s)",
+                    janela.exemplo.getMessage(), janela.suprimidas, self.window_seconds, valores)
+
+class _JanelaDeAmostragem:
+    __slots__ = ('inicio', 'emitidas', 'suprimidas', 'nivel', 'exemplo', 'valores', 'valores_extras')
+
+    def __init__(self, inicio):
+        self.inicio = inicio
+        self.emitidas = 1
+        self.suprimidas = 0
+        self.nivel = logging.INFO
+        self.exemplo = None
+        self.valores = {}  # dict como conjunto ordenado dos args suprimidos
+        self.valores_extras = 0  # ocorrências cujos valores não couberam no resumo
+
+    def suprimir(self, record, max_valores):
+        self.suprimidas += 1
+        self.nivel = max(self.nivel, record.levelno)
+        self.exemplo = record
+        args = record.args
+        valor = repr(args[0] if isinstance(args, tuple) and len(args) == 1 else args)
+        if valor in self.valores:
+            return
+        if len(self.valores) < max_valores:
+            self.valores[valor] = None
+        else:
+            self.valores_extras += 1
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formata eventos (extra={'evento': ..., 'dados': {...}}) como uma linha JSON compacta."""
+    def format(self, record):
+        entrada = {
+            'ts': round(record.created, 3),
+            'nivel': record.levelname,
+            'evento': record.evento,
+            'msg': record.getMessage(),
+        }
+        entrada.update(getattr(record, 'dados', {}))
+        return json.dumps(entrada, separators=(',', ':'), ensure_ascii=False, default=str)
+
+def _eh_evento(record):
+    return hasattr(record, 'evento')
+
+def configurar_logging():
+    """
+    Pipeline de logging assíncrono: o logger raiz só enfileira registros (LazyQueueHandler)
+    e um QueueListener em thread própria formata e escreve no console, no arquivo
+    JSON lines (se LOG_JSONL_PATH estiver definido) e no Telegram (adicionado em main()).
+    """
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    handlers = [console_handler]
+    if LOG_JSONL_PATH:
+        jsonl_handler = logging.FileHandler(LOG_JSONL_PATH, encoding='utf-8')
+        jsonl_handler.setFormatter(JsonLinesFormatter())
+        jsonl_handler.addFilter(_eh_evento)
+        handlers.append(jsonl_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(LOG_SAMPLE_BURST, LOG_SAMPLE_WINDOW_SECONDS))
+    root_logger = logging.getLogger()
+    root_logger.handlers[:] = [queue_handler]
+    root_logger.setLevel(logging.INFO)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+log_listener = configurar_logging()
+
+def adicionar_handler_de_log(handler):
+    """Adiciona um handler ao QueueListener (executado na thread de logging)."""
+    log_listener.handlers = log_listener.handlers + (handler,)
+
 # --- Helper Function for Decimal Conversion ---
 def safe_decimal(value, default_value=Decimal('0')):
     """
@@ -73,9 +290,80 @@ def safe_decimal(value, default_value=Decimal('0')):
     try:
         return Decimal(str(value))
     except (InvalidOperation, TypeError):
-        logging.warning(f"Erro de conversão: valor '{value}' inválido para Decimal. Retornando padrão.")
+        logging.warning("Erro de conversão: valor '%s' inválido para Decimal. Retornando padrão.", value, extra=AMOSTRAR)
         return default_value
 
+# --- Startup Benchmark ---
+startup_metrics = {}
+
+def marcar_inicializacao(etapa):
+    """Registra (uma única vez) o tempo decorrido desde o lançamento até a etapa informada."""
+    if etapa not in startup_metrics:
+        startup_metrics[etapa] = time.perf_counter() - _STARTUP_T0
+
+def relatorio_inicializacao():
+    """Monta o relatório de tempos de inicialização, em ordem cronológica."""
+    etapas = sorted(startup_metrics.items(), key=lambda item: item[1])
+    return "\n".join(f"- {etapa}: {segundos:.3f}s" for etapa, segundos in etapas)
+
+# --- Deferred Imports ---
+def _importar_dependencias():
+    """Importa ccxt.pro e o cliente do Telegram (imports pesados) e os publica como globais."""
+    global ccxt, AsyncTeleBot
+    import ccxt.pro as ccxt_pro
+    from telebot.async_telebot import AsyncTeleBot as async_telebot
+    ccxt = ccxt_pro
+    AsyncTeleBot = async_telebot
+    marcar_inicializacao('dependências importadas')
+
+# --- Markets Cache ---
+def carregar_cache_mercados(exchange_id):
+    """
+    Lê o snapshot local de mercados.
+    Retorna None se o arquivo não existir, for de outra versão/exchange, estiver velho demais ou corrompido.
+    """
+    try:
+        with open(MARKETS_CACHE_PATH, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning("Cache de mercados ilegível (%s): %s", MARKETS_CACHE_PATH, e)
+        return None
+
+    if not isinstance(snapshot, dict):
+        logging.warning("Cache de mercados com formato inválido (%s). Ignorando.", MARKETS_CACHE_PATH)
+        return None
+    if snapshot.get('version') != MARKETS_CACHE_VERSION or snapshot.get('exchange') != exchange_id:
+        logging.info("Cache de mercados de outra versão ou exchange. Ignorando.")
+        return None
+    try:
+        saved_at = datetime.fromisoformat(snapshot['saved_at'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if datetime.now() - saved_at > timedelta(hours=MARKETS_CACHE_MAX_AGE_HOURS):
+        logging.info("Cache de mercados expirado (salvo em %s). Ignorando.", saved_at)
+        return None
+
+    markets = snapshot.get('markets')
+    return markets if isinstance(markets, dict) and markets else None
+
+def salvar_cache_mercados(exchange_id, markets):
+    """Grava o snapshot de mercados de forma atômica (arquivo temporário + os.replace)."""
+    snapshot = {
+        'version': MARKETS_CACHE_VERSION,
+        'exchange': exchange_id,
+        'saved_at': datetime.now().isoformat(),
+        'markets': markets,
+    }
+    tmp_path = f"{MARKETS_CACHE_PATH}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, default=str)
+        os.replace(tmp_path, MARKETS_CACHE_PATH)
+    except (OSError, TypeError, ValueError) as e:
+        logging.warning("Não foi possível salvar o cache de mercados: %s", e)
+
 # --- Bot State and Engine Instance (Global) ---
 state = {
     'is_running': True,
@@ -110,13 +398,13 @@ async def send_balance_command(message):
         await bot.send_message(message.chat.id, reply, parse_mode="Markdown")
     except Exception as e:
         await bot.reply_to(message, f"❌ Erro ao buscar saldos: {e}")
-        logging.error(f"Erro no comando /saldo: {e}")
+        logging.error("Erro no comando /saldo: %s", e)
 
 async def send_status(message):
     status_text = "Rodando" if state['is_running'] else "Pausado"
     mode_text = "Simulação" if state['dry_run'] else "⚠️ MODO REAL ⚠️"
     
-    problematic_pairs_count = len(engine.problematic_pairs) if engine else 0
+    problematic_pairs_count = len(engine.quarentena.pares) if engine else 0
     problem_pairs_text = f"Pares problemáticos: `{problematic_pairs_count}`" if problematic_pairs_count > 0 else "Sem pares problemáticos."
 
     reply = (f"Status: {status_text}\n"
@@ -141,7 +429,7 @@ async def simple_commands(message):
     elif command == 'modo_simulacao':
         state['dry_run'] = True
         await bot.reply_to(message, "Modo de simulação ativado.")
-    logging.info(f"Comando '{command}' executado.")
+    logging.info("Comando '%s' executado.", command)
 
 async def value_commands(message):
     try:
@@ -167,10 +455,10 @@ async def value_commands(message):
             else:
                 await bot.reply_to(message, f"A profundidade deve estar entre {MIN_ROUTE_DEPTH} e 5.")
         
-        logging.info(f"Comando '{command} {value}' executado.")
+        logging.info("Comando '%s %s' executado.", command, value)
     except Exception as e:
         await bot.reply_to(message, f"Erro no comando. Uso: /{command} <valor>")
-        logging.error(f"Erro ao processar comando '{message.text}': {e}")
+        logging.error("Erro ao processar comando '%s': %s", message.text, e)
         
 async def check_websocket_status(message):
     try:
@@ -203,7 +491,7 @@ async def check_websocket_status(message):
 
     except Exception as e:
         await bot.reply_to(message, f"❌ Erro ao verificar o status do WebSocket: {e}")
-        logging.error(f"Erro no comando /verificar_ws: {e}")
+        logging.error("Erro no comando /verificar_ws: %s", e)
 
 # --- Setup function for handlers ---
 def setup_handlers(bot_instance):
@@ -215,6 +503,162 @@ def setup_handlers(bot_instance):
     bot_instance.message_handler(commands=['setlucro', 'setvolume', 'setdepth'])(value_commands)
     bot_instance.message_handler(commands=['verificar_ws'])(check_websocket_status)
 
+# --- Quarantine and Route Index ---
+class IndiceDeRotas:
+    """
+    Índice rota <-> par. Cada par guarda a lista de índices das rotas que o contêm,
+    o estado de cada rota fica em `ativa` (bytearray; 1 = sem pares em quarentena) e
+    uso_do_par conta quantas rotas ativas usam cada par. Bloquear ou liberar um par
+    percorre apenas as rotas daquele par. Mantém, de forma incremental, o conjunto de
+    pares necessários: os usados por ao menos uma rota ativa. Os métodos que alteram o estado retornam os pares que
+    entraram ou saíram de required_pairs.
+    """
+    def __init__(self):
+        self.rotas = []
+        self.pares_da_rota = []
+        self.rotas_do_par = {}
+        self.ativa = bytearray()
+        self.uso_do_par = {}  # par -> nº de rotas ativas que o usam
+        self.required_pairs = set()
+        self._lista_ativas = None
+
+    def reconstruir(self, rotas, resolver_par, pares_bloqueados):
+        """Reindexa todas as rotas. resolver_par(coin_from, coin_to) retorna o símbolo do par ou None."""
+        required_antes = self.required_pairs
+        self.rotas = list(rotas)
+        self.pares_da_rota = []
+        self.rotas_do_par = {}
+        validas = []
+        for idx, rota in enumerate(self.rotas):
+            pares = tuple(resolver_par(rota[i], rota[i+1]) for i in range(len(rota) - 1))
+            if not all(pares):
+                # Rota com perna sem mercado: nunca pode ser simulada.
+                self.pares_da_rota.append(())
+                continue
+            pares = tuple(dict.fromkeys(pares))
+            self.pares_da_rota.append(pares)
+            validas.append(idx)
+            for pair in pares:
+                self.rotas_do_par.setdefault(pair, []).append(idx)
+
+        self.ativa = bytearray(len(self.rotas))
+        self.uso_do_par = {}
+        for idx in validas:
+            if not any(pair in pares_bloqueados for pair in self.pares_da_rota[idx]):
+                self.ativa[idx] = 1
+                for pair in self.pares_da_rota[idx]:
+                    self.uso_do_par[pair] = self.uso_do_par.get(pair, 0) + 1
+        self.required_pairs = set(self.uso_do_par)
+        self._lista_ativas = None
+        return required_antes ^ self.required_pairs
+
+    def bloquear(self, pair):
+        """Desativa somente as rotas ativas que contêm o par."""
+        desativar = [idx for idx in self.rotas_do_par.get(pair, ()) if self.ativa[idx]]
+        if not desativar:
+            return set()
+        for idx in desativar:
+            self.ativa[idx] = 0
+        self._lista_ativas = None
+        return self._ajustar_uso(desativar, -1)
+
+    def liberar(self, pair, pares_bloqueados):
+        """Reativa as rotas que contêm o par e não dependem de nenhum outro par ainda bloqueado."""
+        reativar = [
+            idx for idx in self.rotas_do_par.get(pair, ())
+            if not self.ativa[idx] and not any(p in pares_bloqueados for p in self.pares_da_rota[idx])
+        ]
+        if not reativar:
+            return set()
+        for idx in reativar:
+            self.ativa[idx] = 1
+        self._lista_ativas = None
+        return self._ajustar_uso(reativar, 1)
+
+    def rotas_ativas_lista(self):
+        """Rotas ativas na ordem original (cacheada até a próxima mudança)."""
+        if self._lista_ativas is None:
+            self._lista_ativas = [rota for rota, ativa in zip(self.rotas, self.ativa) if ativa]
+        return self._lista_ativas
+
+    def prioridade(self, pair):
+        """Quantidade de rotas que usam o par; pares mais valiosos são assinados primeiro."""
+        return len(self.rotas_do_par.get(pair, ()))
+
+    def _ajustar_uso(self, indices, delta):
+        alterados = set()
+        for idx in indices:
+            for pair in self.pares_da_rota[idx]:
+                uso = self.uso_do_par.get(pair, 0) + delta
+                if uso > 0:
+                    if pair not in self.uso_do_par: alterados.add(pair)
+                    self.uso_do_par[pair] = uso
+                else:
+                    self.uso_do_par.pop(pair, None)
+                    alterados.add(pair)
+        for pair in alterados:
+            if pair in self.uso_do_par: self.required_pairs.add(pair)
+            else: self.required_pairs.discard(pair)
+        return alterados
+
+class QuarentenaDePares:
+    """
+    Pares em quarentena com expiração controlada por um heap (expira_em, par)
+    e um único timer do event loop (loop.call_at) armado para a expiração mais próxima.
+    ao_entrar(par) e ao_sair(par) são chamados quando um par entra ou sai da quarentena.
+    """
+    def __init__(self, loop, duracao_segundos, ao_entrar, ao_sair):
+        self.loop = loop
+        self.duracao_segundos = duracao_segundos
+        self.ao_entrar = ao_entrar
+        self.ao_sair = ao_sair
+        self.pares = {}  # par -> {'timestamp', 'error', 'expira_em'}
+        self._heap = []
+        self._timer = None
+
+    def adicionar(self, pair, erro):
+        """Coloca (ou mantém por mais um período) o par em quarentena."""
+        novo = pair not in self.pares
+        expira_em = self.loop.time() + self.duracao_segundos
+        self.pares[pair] = {'timestamp': datetime.now(), 'error': erro, 'expira_em': expira_em}
+        heapq.heappush(self._heap, (expira_em, pair))
+        self._armar_timer()
+        if novo:
+            self.ao_entrar(pair)
+
+    def limpar(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self.pares.clear()
+        self._heap.clear()
+
+    def _armar_timer(self):
+        # Descarta do topo as entradas obsoletas (par liberado ou quarentena renovada).
+        while self._heap and self.pares.get(self._heap[0][1], {}).get('expira_em') != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return
+        proxima = self._heap[0][0]
+        if self._timer and self._timer.when() <= proxima:
+            return
+        if self._timer:
+            self._timer.cancel()
+        self._timer = self.loop.call_at(proxima, self._expirar)
+
+    def _expirar(self):
+        self._timer = None
+        agora = self.loop.time()
+        while self._heap and self._heap[0][0] <= agora:
+            expira_em, pair = heapq.heappop(self._heap)
+            info = self.pares.get(pair)
+            if info is None or info['expira_em'] != expira_em:
+                continue
+            del self.pares[pair]
+            logging.info("Quarentena do par %s finalizada. O par será reativado para monitoramento.", pair)
+            self.ao_sair(pair)
+        self._armar_timer()
+
 # --- Arbitrage Logic ---
 class ArbitrageEngine:
     def __init__(self, exchange_instance, event_loop):
@@ -225,47 +669,145 @@ class ArbitrageEngine:
         self.rotas_viaveis = []
         self.last_depth = state['max_depth']
         self.order_books = {}
-        self.problematic_pairs = {}
         self.websocket_tasks = {}
-        
-    def construir_rotas(self):
-        logging.info("Construindo mapa de rotas...")
-        self.graph = {}
-        self.rotas_viaveis = []
+        self.primeira_rota_pontuada = asyncio.Event()
+        self.indice = IndiceDeRotas()
+        self.pares_pendentes = set()  # pares cuja tarefa de WebSocket precisa ser criada/cancelada
+        self.quarentena = QuarentenaDePares(
+            self.loop, PROBLEM_PAIRS_COOLDOWN_MINUTES * 60,
+            ao_entrar=lambda pair: self.pares_pendentes.update(self.indice.bloquear(pair)),
+            ao_sair=lambda pair: self.pares_pendentes.update(self.indice.liberar(pair, self.quarentena.pares))
+        )
 
-        active_markets = {
-            s: m for s, m in self.markets.items()
+    @staticmethod
+    def _mercados_negociaveis(markets):
+        return {
+            s: m for s, m in markets.items()
             if m.get('active')
             and m.get('base') and m.get('quote')
             and m['base'] not in FIAT_CURRENCIES and m['quote'] not in FIAT_CURRENCIES
             and m['base'] not in BLACKLIST_MOEDAS and m['quote'] not in BLACKLIST_MOEDAS
         }
-        tradable_markets = active_markets
 
-        for symbol, market in tradable_markets.items():
+    @staticmethod
+    def _arestas(markets):
+        """Conjunto de arestas do grafo (pares de moedas não ordenados) para um dicionário de mercados."""
+        return {frozenset((m['base'], m['quote'])) for m in ArbitrageEngine._mercados_negociaveis(markets).values()}
+
+    def _construir_grafo(self):
+        self.graph = {}
+        for symbol, market in self._mercados_negociaveis(self.markets).items():
             base, quote = market['base'], market['quote']
             if base not in self.graph: self.graph[base] = []
             if quote not in self.graph: self.graph[quote] = []
             self.graph[base].append(quote)
             self.graph[quote].append(base)
 
+    def _distancias_ate(self, moedas):
+        """BFS: número mínimo de arestas de cada moeda do grafo até a moeda mais próxima do conjunto."""
+        distancias = {m: 0 for m in moedas if m in self.graph}
+        fila = list(distancias)
+        for u in fila:
+            for v in self.graph.get(u, []):
+                if v not in distancias:
+                    distancias[v] = distancias[u] + 1
+                    fila.append(v)
+        return distancias
+
+    def _encontrar_rotas(self, arestas_obrigatorias=None):
+        """
+        Enumera os ciclos a partir das moedas base operacionais.
+        Se arestas_obrigatorias for informado, retorna apenas as rotas que passam por alguma delas,
+        podando os caminhos que não conseguem mais alcançá-las dentro da profundidade máxima.
+        """
+        max_depth = state['max_depth']
+        distancias = self._distancias_ate(set().union(*arestas_obrigatorias)) if arestas_obrigatorias else None
         todas_as_rotas = []
-        def encontrar_ciclos_dfs(u, path, depth):
-            if depth > state['max_depth']: return
+
+        def encontrar_ciclos_dfs(u, path, depth, usou_obrigatoria):
+            if depth > max_depth: return
+            if distancias is not None and not usou_obrigatoria:
+                arestas_restantes = max_depth - depth + 1
+                if distancias.get(u, float('inf')) + 1 > arestas_restantes: return
             for v in self.graph.get(u, []):
+                usou = usou_obrigatoria or (distancias is not None and frozenset((u, v)) in arestas_obrigatorias)
                 if v in MOEDAS_BASE_OPERACIONAIS and len(path) >= MIN_ROUTE_DEPTH:
                     rota = path + [v]
-                    if len(set(rota)) == len(rota) - 1: todas_as_rotas.append(rota)
-                elif v not in path: encontrar_ciclos_dfs(v, path + [v], depth + 1)
+                    if len(set(rota)) == len(rota) - 1 and (distancias is None or usou): todas_as_rotas.append(rota)
+                elif v not in path: encontrar_ciclos_dfs(v, path + [v], depth + 1, usou)
 
         for base_moeda in MOEDAS_BASE_OPERACIONAIS:
-            encontrar_ciclos_dfs(base_moeda, [base_moeda], 1)
+            encontrar_ciclos_dfs(base_moeda, [base_moeda], 1, False)
+
+        return [tuple(rota) for rota in todas_as_rotas]
 
-        self.rotas_viaveis = [tuple(rota) for rota in todas_as_rotas]
+    def construir_rotas(self):
+        logging.info("Construindo mapa de rotas...")
+        self._construir_grafo()
+        self.rotas_viaveis = self._encontrar_rotas()
         self.last_depth = state['max_depth']
-        logging.info(f"Mapa de rotas reconstruído para profundidade {self.last_depth}. {len(self.rotas_viaveis)} rotas encontradas.")
+        self._reindexar_rotas()
+        marcar_inicializacao('mapa de rotas construído')
+        logging.info("Mapa de rotas reconstruído para profundidade %d. %d rotas encontradas.", self.last_depth, len(self.rotas_viaveis))
         asyncio.create_task(bot.send_message(CHAT_ID, f"🗺️ Mapa de rotas reconstruído para profundidade {self.last_depth}. {len(self.rotas_viaveis)} rotas encontradas."))
 
+    def aplicar_diff_mercados(self, novos_mercados):
+        """
+        Substitui os mercados e atualiza o mapa de rotas de forma incremental:
+        remove apenas as rotas que usam arestas que deixaram de existir e busca
+        apenas as rotas que passam pelas arestas novas.
+        """
+        arestas_antigas = self._arestas(self.markets)
+        self.markets = novos_mercados
+        if not self.graph:
+            # O mapa ainda não foi construído; o próximo construir_rotas() usará os novos mercados.
+            return
+        arestas_novas = self._arestas(novos_mercados)
+        removidas = arestas_antigas - arestas_novas
+        adicionadas = arestas_novas - arestas_antigas
+        if not removidas and not adicionadas:
+            logging.info("Mercados atualizados: nenhuma alteração no mapa de rotas.")
+            # Os símbolos podem ter mudado mesmo com o mesmo grafo (ex.: spot removido, swap mantido).
+            self._reindexar_rotas()
+            return
+
+        self._construir_grafo()
+        total_antes = len(self.rotas_viaveis)
+        if removidas:
+            self.rotas_viaveis = [
+                rota for rota in self.rotas_viaveis
+                if not any(frozenset((rota[i], rota[i+1])) in removidas for i in range(len(rota) - 1))
+            ]
+        removidas_rotas = total_antes - len(self.rotas_viaveis)
+        novas_rotas = 0
+        if adicionadas:
+            existentes = set(self.rotas_viaveis)
+            for rota in self._encontrar_rotas(adicionadas):
+                if rota not in existentes:
+                    existentes.add(rota)
+                    self.rotas_viaveis.append(rota)
+                    novas_rotas += 1
+        self._reindexar_rotas()
+        logging.info("Mercados atualizados: %d arestas novas, %d removidas. Rotas: +%d / -%d (total %d).",
+                     len(adicionadas), len(removidas), novas_rotas, removidas_rotas, len(self.rotas_viaveis))
+
+    async def atualizar_mercados_em_segundo_plano(self):
+        """Recarrega os mercados da exchange, salva o cache e aplica o diff ao mapa de rotas."""
+        try:
+            await self.exchange.load_markets(reload=True)
+        except Exception as e:
+            logging.warning("Falha ao atualizar mercados em segundo plano (usando cache): %s", e)
+            return
+        await asyncio.to_thread(salvar_cache_mercados, self.exchange.id, self.exchange.markets)
+        self.aplicar_diff_mercados(self.exchange.markets)
+        marcar_inicializacao('mercados atualizados em segundo plano')
+
+    def _reindexar_rotas(self):
+        """Reconstrói o índice rota <-> par e agenda (des)assinaturas dos pares que mudaram."""
+        self.pares_pendentes |= self.indice.reconstruir(
+            self.rotas_viaveis, lambda a, b: self._get_pair_details(a, b)[0], self.quarentena.pares
+        )
+
     def _get_pair_details(self, coin_from, coin_to):
         pair_v1 = f"{coin_from}/{coin_to}"
         if pair_v1 in self.markets: return pair_v1, 'sell'
@@ -330,6 +872,8 @@ class ArbitrageEngine:
 
     async def _executar_trade_async(self, cycle_path, volume_a_usar):
         base_moeda = cycle_path[0]
+        logging.info("Execução iniciada: rota %s, investimento %s %s", cycle_path, volume_a_usar, base_moeda,
+                     extra={'evento': 'execucao_inicio', 'dados': {'rota': cycle_path, 'volume': volume_a_usar}})
         asyncio.create_task(bot.send_message(CHAT_ID, f"🚀 **MODO REAL** 🚀\nIniciando execução da rota: `{' -> '.join(cycle_path)}`\nInvestimento planejado: `{volume_a_usar:.8f} {base_moeda}`", parse_mode="Markdown"))
 
         moedas_presas = []
@@ -361,11 +905,11 @@ class ArbitrageEngine:
                         if loss_percentage < STOP_LOSS_LEVEL_2_PERCENT:
                             await bot.send_message(CHAT_ID, f"🛑 **STOP-LOSS ATIVADO (ROTA CANCELADA)**\nQueda de `{loss_percentage:.2f}%` do valor do investimento original. Executando venda de emergência.", parse_mode="Markdown")
                             # Em vez de levantar um erro crítico, tratamos como um evento de informação
-                            logging.info(f"Stop-loss Nível 2 ativado. Queda de {loss_percentage:.2f}%.")
+                            logging.info("Stop-loss Nível 2 ativado. Queda de %.2f%%.", loss_percentage)
                             raise Exception("Stop-loss Level 2 activated.")
                         elif loss_percentage < STOP_LOSS_LEVEL_1_PERCENT:
                             await bot.send_message(CHAT_ID, f"⚠️ **STOP-LOSS ATIVADO (ROTA CANCELADA)**\nQueda de `{loss_percentage:.2f}%` do valor do investimento original. Executando venda de emergência.", parse_mode="Markdown")
-                            logging.info(f"Stop-loss Nível 1 ativado. Queda de {loss_percentage:.2f}%.")
+                            logging.info("Stop-loss Nível 1 ativado. Queda de %.2f%%.", loss_percentage)
                             raise Exception("Stop-loss Level 1 activated.")
                     except Exception as sl_error:
                         raise sl_error
@@ -408,7 +952,8 @@ class ArbitrageEngine:
                                 f"Preço de Execução Estimado: `{price_to_use:.8f}`")
                     await bot.send_message(CHAT_ID, diag_msg, parse_mode="Markdown")
                     
-                    logging.info(f"✅ DIAGNÓSTICO: Tentando COMPRAR {trade_volume_precisao} {coin_to} com {current_amount} {coin_from} no par {pair_id}")
+                    logging.info("✅ DIAGNÓSTICO: Tentando COMPRAR %s %s com %s %s no par %s", trade_volume_precisao, coin_to, current_amount, coin_from, pair_id,
+                                 extra={'evento': 'execucao_ordem', 'dados': {'par': pair_id, 'lado': side, 'volume': trade_volume_precisao, 'preco': price_to_use}})
                     order = await self.exchange.create_market_buy_order(pair_id, trade_volume_precisao)
 
                 else:
@@ -435,7 +980,8 @@ class ArbitrageEngine:
                                 f"Volume: `{trade_volume_precisao}`")
                     await bot.send_message(CHAT_ID, diag_msg, parse_mode="Markdown")
                     
-                    logging.info(f"✅ DIAGNÓSTICO: Tentando VENDER com {trade_volume_precisao} {coin_from} no par {pair_id}")
+                    logging.info("✅ DIAGNÓSTICO: Tentando VENDER com %s %s no par %s", trade_volume_precisao, coin_from, pair_id,
+                                 extra={'evento': 'execucao_ordem', 'dados': {'par': pair_id, 'lado': side, 'volume': trade_volume_precisao, 'preco': estimated_price}})
                     order = await self.exchange.create_market_sell_order(pair_id, trade_volume_precisao)
 
                 await asyncio.sleep(2.5)
@@ -452,17 +998,19 @@ class ArbitrageEngine:
             # Se a exceção for devido ao stop-loss, a mensagem de log será mais informativa
             # e não será tratada como um erro crítico geral.
             if "Stop-loss" in str(leg_error):
-                logging.info(f"Stop-loss ativado. Rota cancelada.")
+                logging.info("Stop-loss ativado. Rota cancelada.",
+                             extra={'evento': 'execucao_falha', 'dados': {'rota': cycle_path, 'etapa': i+1, 'erro': str(leg_error)}})
                 mensagem_detalhada = f"Erro na etapa {i+1} da rota: Stop-loss ativado."
             else:
-                logging.critical(f"FALHA NA ETAPA {i+1} ({coin_from}->{coin_to}): {leg_error}")
+                logging.critical("FALHA NA ETAPA %d (%s->%s): %s", i+1, coin_from, coin_to, leg_error,
+                                 extra={'evento': 'execucao_falha', 'dados': {'rota': cycle_path, 'etapa': i+1, 'erro': str(leg_error)}})
                 mensagem_detalhada = f"Erro na etapa {i+1} da rota: `{leg_error}`"
 
             await bot.send_message(CHAT_ID, f"🔴 **FALHA NA ROTA!**\n{mensagem_detalhada}", parse_mode="Markdown")
             
             # Adiciona o par problemático à lista de quarentena
-            logging.info(f"Adicionando par {pair_id} à lista de problemáticos devido a restrições.")
-            self.problematic_pairs[pair_id] = {'timestamp': datetime.now(), 'error': str(leg_error)}
+            logging.info("Adicionando par %s à lista de problemáticos devido a restrições.", pair_id)
+            self.quarentena.adicionar(pair_id, str(leg_error))
 
             if moedas_presas:
                 ativo_preso_details = moedas_presas[-1]
@@ -496,51 +1044,46 @@ class ArbitrageEngine:
         if initial_investment_value == 0: lucro_real_percent = Decimal('0')
         else: lucro_real_percent = (lucro_real_usdt / initial_investment_value) * 100
 
+        logging.info("Execução concluída: rota %s, lucro %.4f %s (%.4f%%)", cycle_path, lucro_real_usdt, base_moeda, lucro_real_percent,
+                     extra={'evento': 'execucao_sucesso', 'dados': {'rota': cycle_path, 'lucro': lucro_real_usdt, 'lucro_percent': lucro_real_percent}})
         await bot.send_message(CHAT_ID, f"✅ **SUCESSO! Rota Concluída.**\nRota: `{' -> '.join(cycle_path)}`\nLucro: `{lucro_real_usdt:.4f} {base_moeda}` (`{lucro_real_percent:.4f}%`)", parse_mode="Markdown")
     
     async def _manage_websocket_task(self, symbol):
         """
         Gerencia uma conexão WebSocket para um único par de moedas.
+        Em caso de erro inesperado o par vai para a quarentena e a tarefa termina;
+        uma nova tarefa é criada quando a quarentena expira e o par volta a ser necessário.
         """
         reconnect_attempts = 0
         while reconnect_attempts < MAX_RECONNECT_ATTEMPTS:
             try:
-                if symbol in self.problematic_pairs:
-                    logging.info(f"O par {symbol} está em quarentena. Não será monitorado por enquanto.")
-                    await asyncio.sleep(PROBLEM_PAIRS_COOLDOWN_MINUTES * 60)
-                    if symbol in self.problematic_pairs:
-                        del self.problematic_pairs[symbol]
-                        logging.info(f"Quarentena do par {symbol} finalizada.")
-                
-                logging.info(f"Iniciando a escuta do livro de ofertas para {symbol} via WebSocket...")
+                logging.info("Iniciando a escuta do livro de ofertas para %s via WebSocket...", symbol, extra=AMOSTRAR)
                 
                 # Assinatura do WebSocket para o livro de ofertas (order book)
                 await self._subscribe_to_order_book(symbol)
 
-                # Loop de atualização. Se o WebSocket fechar, a exceção será capturada.
-                while True:
-                    await asyncio.sleep(1) # Mantém o loop ativo
+                # O ccxt.pro mantém o livro atualizado; a tarefa só aguarda o cancelamento.
+                await asyncio.get_running_loop().create_future()
 
             except asyncio.CancelledError:
-                logging.info(f"Tarefa de WebSocket para {symbol} foi cancelada.")
+                logging.info("Tarefa de WebSocket para %s foi cancelada.", symbol, extra=AMOSTRAR)
                 await self._unsubscribe_from_order_book(symbol)
                 break  # Sai do loop `while True` para finalizar a tarefa
 
             except ccxt.NetworkError as e:
-                logging.warning(f"Erro de rede para {symbol}. Tentativa de reconexão {reconnect_attempts + 1}/{MAX_RECONNECT_ATTEMPTS}...")
+                logging.warning("Erro de rede para %s. Tentativa de reconexão %d/%d...", symbol, reconnect_attempts + 1, MAX_RECONNECT_ATTEMPTS)
                 if VERBOSE_ERROR_LOGGING:
-                    logging.debug(f"Detalhes do erro: {e}")
+                    logging.debug("Detalhes do erro: %s", e)
                 reconnect_attempts += 1
                 await asyncio.sleep(10)  # Espera antes de tentar reconectar
 
             except Exception as e:
-                logging.error(f"Erro inesperado no WebSocket para {symbol}: {e}. Adicionando par à lista problemática.")
+                logging.error("Erro inesperado no WebSocket para %s: %s. Adicionando par à lista problemática.", symbol, e)
                 if VERBOSE_ERROR_LOGGING:
-                    logging.debug(traceback.format_exc())
-                self.problematic_pairs[symbol] = {'timestamp': datetime.now(), 'error': str(e)}
+                    logging.debug("Traceback:", exc_info=True)
                 await self._unsubscribe_from_order_book(symbol)
-                await asyncio.sleep(PROBLEM_PAIRS_COOLDOWN_MINUTES * 60) # Pausa o loop da tarefa por um tempo
-                reconnect_attempts = 0 # Reseta as tentativas de reconexão
+                self.quarentena.adicionar(symbol, str(e))
+                return
 
     async def _subscribe_to_order_book(self, symbol):
         """Assina o livro de ofertas de um par de moedas e o mantém atualizado no cache."""
@@ -548,7 +1091,8 @@ class ArbitrageEngine:
             # O ccxt.pro lida com a lógica de assinatura e atualização automática
             ws_book = await self.exchange.watch_order_book(symbol, limit=ORDER_BOOK_DEPTH)
             self.order_books[symbol] = ws_book
-            logging.info(f"Inscrição no livro de ofertas de {symbol} feita com sucesso.")
+            marcar_inicializacao('primeiro livro de ofertas recebido')
+            logging.info("Inscrição no livro de ofertas de %s feita com sucesso.", symbol, extra=AMOSTRAR)
         except Exception as e:
             raise Exception(f"Falha ao subscrever o livro de ofertas para {symbol}: {e}")
 
@@ -557,19 +1101,43 @@ class ArbitrageEngine:
         try:
             if symbol in self.exchange.subscriptions:
                 await self.exchange.close()
-                logging.info(f"Assinatura de {symbol} cancelada e conexão fechada.")
+                logging.info("Assinatura de %s cancelada e conexão fechada.", symbol, extra=AMOSTRAR)
             if symbol in self.order_books:
                 del self.order_books[symbol]
         except Exception as e:
-            logging.error(f"Erro ao cancelar a assinatura de {symbol}: {e}")
+            logging.error("Erro ao cancelar a assinatura de %s: %s", symbol, e)
+
+    def _sincronizar_assinaturas(self):
+        """
+        Cria ou cancela tarefas de WebSocket apenas para os pares cujo estado mudou
+        (índice de rotas, quarentena ou tarefa finalizada), dos mais valiosos para os menos.
+        """
+        pendentes, self.pares_pendentes = self.pares_pendentes, set()
+        for pair in sorted(pendentes, key=self.indice.prioridade, reverse=True):
+            task = self.websocket_tasks.get(pair)
+            if pair in self.indice.required_pairs:
+                if task is not None and not task.done():
+                    continue
+                if task is not None:
+                    logging.warning("Tarefa de WS para %s finalizou inesperadamente. Reiniciando...", pair)
+                task = asyncio.create_task(self._manage_websocket_task(pair))
+                task.add_done_callback(lambda t, p=pair: self._ao_finalizar_tarefa_ws(p, t))
+                self.websocket_tasks[pair] = task
+            elif task is not None:
+                if not task.done():
+                    task.cancel()
+                del self.websocket_tasks[pair]
+
+    def _ao_finalizar_tarefa_ws(self, pair, task):
+        # Tarefas canceladas pelo próprio engine já saíram de websocket_tasks.
+        if self.websocket_tasks.get(pair) is task:
+            self.pares_pendentes.add(pair)
 
     async def run_arbitrage_loop_inner(self):
         """O loop de arbitragem que pode falhar e ser reiniciado."""
         logging.info("Iniciando loop principal de arbitragem...")
         self.construir_rotas()
         
-        last_problem_check = datetime.now()
-        
         while True:
             if not state['is_running']:
                 logging.info("Bot pausado. Aguardando comando para retomar...")
@@ -577,18 +1145,6 @@ class ArbitrageEngine:
                     await asyncio.sleep(1)
                 logging.info("Bot retomado. Continuanddo operação.")
             
-            if datetime.now() - last_problem_check > timedelta(minutes=PROBLEM_PAIRS_COOLDOWN_MINUTES):
-                logging.info("Reavaliando pares problemáticos...")
-                problematic_to_reactivate = []
-                for pair, info in self.problematic_pairs.items():
-                    if datetime.now() - info['timestamp'] > timedelta(minutes=PROBLEM_PAIRS_COOLDOWN_MINUTES):
-                        problematic_to_reactivate.append(pair)
-                
-                for pair in problematic_to_reactivate:
-                    del self.problematic_pairs[pair]
-                    logging.info(f"O par {pair} será reativado para monitoramento.")
-                last_problem_check = datetime.now()
-
             volumes_a_usar = {}
             balance = await self.exchange.fetch_balance()
             for moeda in MOEDAS_BASE_OPERACIONAIS:
@@ -598,28 +1154,12 @@ class ArbitrageEngine:
             if self.last_depth != state['max_depth']:
                 self.construir_rotas()
 
-            required_pairs = set()
-            for rota in self.rotas_viaveis:
-                for i in range(len(rota) - 1):
-                    pair_id, _ = self._get_pair_details(rota[i], rota[i+1])
-                    if pair_id and pair_id not in self.problematic_pairs:
-                        required_pairs.add(pair_id)
-            
-            for pair in required_pairs:
-                if pair not in self.websocket_tasks or self.websocket_tasks[pair].done():
-                    if pair in self.websocket_tasks:
-                        logging.warning(f"Tarefa de WS para {pair} finalizou inesperadamente. Reiniciando...")
-                    self.websocket_tasks[pair] = asyncio.create_task(self._manage_websocket_task(pair))
-
-            stale_tasks = [pair for pair in self.websocket_tasks if pair not in required_pairs and not self.websocket_tasks[pair].done()]
-            for pair in stale_tasks:
-                self.websocket_tasks[pair].cancel()
-                del self.websocket_tasks[pair]
+            self._sincronizar_assinaturas()
             
             await asyncio.sleep(0.5)
 
             if self.order_books:
-                for cycle_tuple in self.rotas_viaveis:
+                for cycle_tuple in self.indice.rotas_ativas_lista():
                     base_moeda_da_rota = cycle_tuple[0]
                     volume_da_rota = volumes_a_usar.get(base_moeda_da_rota, Decimal('0'))
 
@@ -627,10 +1167,16 @@ class ArbitrageEngine:
                         continue
 
                     resultado = self._simular_trade_com_slippage(list(cycle_tuple), volume_da_rota)
+
+                    if resultado is not None and not self.primeira_rota_pontuada.is_set():
+                        marcar_inicializacao('primeira rota pontuada')
+                        logging.info("⏱️ Primeira rota pontuada em %.3fs desde o lançamento.", startup_metrics['primeira rota pontuada'])
+                        self.primeira_rota_pontuada.set()
                     
                     if resultado is not None and resultado > state['min_profit']:
                         msg = f"✅ **OPORTUNIDADE**\nLucro: `{resultado:.4f}%`\nRota: `{' -> '.join(cycle_tuple)}`"
-                        logging.info(msg)
+                        logging.info("OPORTUNIDADE: lucro %.4f%%, rota %s", resultado, cycle_tuple,
+                                     extra={'evento': 'oportunidade', 'dados': {'rota': cycle_tuple, 'lucro_percent': resultado, 'volume': volume_da_rota, 'dry_run': state['dry_run']}})
                         asyncio.create_task(bot.send_message(CHAT_ID, msg, parse_mode="Markdown"))
 
                         if not state['dry_run']:
@@ -652,60 +1198,91 @@ class ArbitrageEngine:
                 await self.run_arbitrage_loop_inner()
             except Exception as e:
                 error_trace = traceback.format_exc()
-                logging.critical(f"❌ ERRO FATAL! O engine caiu. Reiniciando em 15 segundos...\nDetalhes: {e}\n\n{error_trace}")
+                logging.critical("❌ ERRO FATAL! O engine caiu. Reiniciando em 15 segundos...\nDetalhes: %s\n\n%s", e, error_trace)
                 try:
                     await bot.send_message(CHAT_ID, f"🔴 **ERRO CRÍTICO! O engine caiu.**\nDetalhes: `{e}`\n\n```\n{error_trace}\n```\n\n**Tentando reiniciar o engine...**", parse_mode="Markdown")
                 except Exception as alert_e:
-                    logging.error(f"Falha ao enviar alerta de erro: {alert_e}")
+                    logging.error("Falha ao enviar alerta de erro: %s", alert_e)
                 
                 for task in list(self.websocket_tasks.values()):
                     if not task.done():
                         task.cancel()
                 self.websocket_tasks.clear()
                 self.order_books.clear()
-                self.problematic_pairs.clear()
+                self.quarentena.limpar()
+                self.indice = IndiceDeRotas()
+                self.pares_pendentes.clear()
 
                 await asyncio.sleep(15)
 
+def _criar_exchange_okx():
+    return ccxt.okx({
+        'apiKey': OKX_API_KEY,
+        'secret': OKX_API_SECRET,
+        'password': OKX_API_PASSWORD,
+        'options': {'defaultType': 'spot'},
+        'timeout': API_TIMEOUT_SECONDS * 1000
+    })
+
+async def inicializar(criar_bot=None, criar_exchange=None):
+    """
+    Caminho de inicialização: importa as dependências em paralelo com a leitura do cache,
+    cria bot e exchange, carrega os mercados e instancia o engine.
+    As fábricas permitem que o benchmark_startup.py use bot e exchange falsos.
+    Retorna os mercados lidos do cache (ou None, se o carregamento foi completo).
+    """
+    global bot, exchange, engine
+
+    # 1. Import heavy libraries while the cached markets snapshot is read
+    _, cached_markets = await asyncio.gather(
+        asyncio.to_thread(_importar_dependencias),
+        asyncio.to_thread(carregar_cache_mercados, 'okx')
+    )
+
+    # 2. Initialize Bot and Exchange
+    bot = criar_bot() if criar_bot else AsyncTeleBot(TOKEN)
+    exchange = criar_exchange() if criar_exchange else _criar_exchange_okx()
+
+    if cached_markets:
+        exchange.set_markets(cached_markets)
+        logging.info("%d mercados carregados do cache local. Atualização em segundo plano.", len(cached_markets))
+    else:
+        await exchange.load_markets()
+        await asyncio.to_thread(salvar_cache_mercados, exchange.id, exchange.markets)
+    marcar_inicializacao('mercados carregados')
+
+    # 3. Initialize Arbitrage Engine
+    engine = ArbitrageEngine(exchange, asyncio.get_event_loop())
+    if cached_markets:
+        asyncio.create_task(engine.atualizar_mercados_em_segundo_plano())
+    return cached_markets
+
 async def main():
     """Função principal que inicia o bot e o loop de arbitragem."""
     try:
         logging.info("Iniciando bot v39.1 (Bot de Arbitragem)...")
-        global bot, exchange, engine
-        
-        # 1. Initialize Bot and Exchange
-        bot = AsyncTeleBot(TOKEN)
-        exchange = ccxt.okx({
-            'apiKey': OKX_API_KEY,
-            'secret': OKX_API_SECRET,
-            'password': OKX_API_PASSWORD,
-            'options': {'defaultType': 'spot'},
-            'timeout': API_TIMEOUT_SECONDS * 1000
-        })
         
-        await exchange.load_markets()
+        # 1. Initialize Bot, Exchange and Arbitrage Engine
+        await inicializar()
         logging.info("Bibliotecas Telebot e CCXT inicializadas com sucesso.")
         
         # 2. Setup Log Handler
         telegram_handler = TelegramHandler(bot, CHAT_ID, asyncio.get_event_loop(), level=logging.CRITICAL)
-        logging.getLogger().addHandler(telegram_handler)
+        adicionar_handler_de_log(telegram_handler)
 
         # 3. Setup Command Handlers
         setup_handlers(bot)
 
-        # 4. Initialize Arbitrage Engine
-        engine = ArbitrageEngine(exchange, asyncio.get_event_loop())
-
         logging.info("Bot e exchange inicializados. Iniciando tarefas de arbitragem e polling do Telegram.")
         
-        # 5. Run the core tasks
+        # 4. Run the core tasks
         await asyncio.gather(
             engine.run_arbitrage_loop_outer(),
             bot.polling(none_stop=True)
         )
         
     except Exception as e:
-        logging.critical(f"❌ Ocorreu um erro fatal durante a execução do bot: {e}")
+        logging.critical("❌ Ocorreu um erro fatal durante a execução do bot: %s", e)
         traceback.print_exc()
 
 if __name__ == "__main__":